@@ -1,3 +1,5 @@
+from typing import Union
+
 import torch
 import torch.nn as nn
 import torch.nn.init as init
@@ -94,8 +96,14 @@ class AttrsHead(nn.Module):
         else:
             raise ValueError(f'Unknown init type: {self.config.init.type}')
 
-    def forward(self, x: Tensor, attrs_mask: bool=None, return_prelogits: bool=False) -> Tensor:
-        attrs = self.attrs if attrs_mask is None else self.attrs[attrs_mask]
+    def forward(self, x: Tensor, attrs_mask: Union[np.ndarray, Tensor]=None, return_prelogits: bool=False) -> Tensor:
+        if attrs_mask is None:
+            attrs = self.attrs
+        elif isinstance(attrs_mask, Tensor) and attrs_mask.dtype == torch.long:
+            # Class indices which are already on the device
+            attrs = self.attrs.index_select(0, attrs_mask)
+        else:
+            attrs = self.attrs[attrs_mask]
         protos = self.transform(attrs)
 
         if self.config.get('normalize_and_scale', True):
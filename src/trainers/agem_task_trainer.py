@@ -23,6 +23,12 @@ class AgemTaskTrainer(TaskTrainer):
             self.episodic_memory = prev_trainer.episodic_memory
             self.episodic_memory_output_mask = prev_trainer.episodic_memory_output_mask
 
+    def _before_train_hook(self):
+        # Episodic memory does not change while we train on the task,
+        # so we copy its output masks to the device only once
+        if len(self.episodic_memory_output_mask) > 0:
+            self.episodic_memory_output_mask_t = self.to_device(self.episodic_memory_output_mask)
+
     def is_trainable(self) -> bool:
         if not super().is_trainable:
             return False
@@ -54,12 +60,12 @@ class AgemTaskTrainer(TaskTrainer):
         num_samples_to_use = min(self.config.hp.mem_batch_size, len(self.episodic_memory))
         batch_idx = random.sample(np.arange(len(self.episodic_memory)).tolist(), num_samples_to_use)
         batch = [m for i, m in enumerate(self.episodic_memory) if i in batch_idx]
-        output_mask = np.array([m for i, m in enumerate(self.episodic_memory_output_mask) if i in batch_idx])
+        output_mask = self.episodic_memory_output_mask_t[self.to_device(sorted(batch_idx))]
 
-        x = torch.from_numpy(np.array([x for x,_ in batch])).to(self.device_name)
-        y = torch.tensor([y for _, y in batch]).to(self.device_name)
+        x = self.to_device([x for x, _ in batch])
+        y = self.to_device([y for _, y in batch])
         logits = self.model(x)
-        pruned_logits = logits.masked_fill(torch.tensor(~output_mask).to(self.device_name), NEG_INF)
+        pruned_logits = logits.masked_fill(~output_mask, NEG_INF)
         loss = self.criterion(pruned_logits, y)
         loss.backward()
         ref_grad = torch.cat([p.grad.data.view(-1) for p in self.model.parameters() if p.requires_grad])
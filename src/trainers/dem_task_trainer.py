@@ -28,26 +28,27 @@ class DEMTaskTrainer(TaskTrainer):
     def train_on_batch(self, batch):
         self.model.train()
 
-        x = torch.from_numpy(np.array(batch[0])).to(self.device_name)
-        y = torch.from_numpy(np.array(batch[1])).to(self.device_name)
+        x = self.to_device(batch[0])
+        y = self.to_device(batch[1])
 
         logits = self.model(x)
-        pruned_logits = prune_logits(logits, self.output_mask)
+        pruned_logits = prune_logits(logits, self.output_mask_t)
 
         cls_loss = F.cross_entropy(pruned_logits, y)
         cls_acc = compute_accuracy(pruned_logits, y)
 
         total_loss = cls_loss
+        scalars = {}
 
         if self.config.hp.lowres_training.loss_coef > 0 or self.config.hp.lowres_training.logits_matching_loss_coef > 0:
             x_lowres = self.transform_em_sample(x, no_grad=False)
             logits_lowres = self.model(x_lowres)
-            pruned_logits_lowres = prune_logits(logits_lowres, self.output_mask)
+            pruned_logits_lowres = prune_logits(logits_lowres, self.output_mask_t)
             cls_loss_lowres = F.cross_entropy(pruned_logits_lowres, y)
             cls_acc_lowres = compute_accuracy(pruned_logits_lowres, y)
 
-            self.writer.add_scalar('train/cls_loss_lowres', cls_loss_lowres.item(), self.num_iters_done)
-            self.writer.add_scalar('train/cls_acc_lowres', cls_acc_lowres.item(), self.num_iters_done)
+            scalars['train/cls_loss_lowres'] = cls_loss_lowres
+            scalars['train/cls_acc_lowres'] = cls_acc_lowres
 
         if self.config.hp.lowres_training.loss_coef > 0:
             total_loss += self.config.hp.lowres_training.loss_coef * cls_loss
@@ -56,21 +57,23 @@ class DEMTaskTrainer(TaskTrainer):
             logits_matching_loss = F.mse_loss(logits, logits_lowres)
             total_loss += self.config.hp.lowres_training.logits_matching_loss_coef * logits_matching_loss
 
-            self.writer.add_scalar('train/logits_matching_loss', logits_matching_loss.item(), self.num_iters_done)
+            scalars['train/logits_matching_loss'] = logits_matching_loss
 
         if self.task_idx > 0:
             rehearsal_loss, rehearsal_acc = self.compute_rehearsal_loss()
             total_loss += self.config.hp.memory.loss_coef * rehearsal_loss
 
-            self.writer.add_scalar('train/rehearsal_loss', rehearsal_loss.item(), self.num_iters_done)
-            self.writer.add_scalar('train/rehearsal_acc', rehearsal_acc.item(), self.num_iters_done)
+            scalars['train/rehearsal_loss'] = rehearsal_loss
+            scalars['train/rehearsal_acc'] = rehearsal_acc
 
         self.optim.zero_grad()
         total_loss.backward()
         self.optim.step()
 
-        self.writer.add_scalar('train/cls_loss', cls_loss.item(), self.num_iters_done)
-        self.writer.add_scalar('train/cls_acc', cls_acc.item(), self.num_iters_done)
+        scalars['train/cls_loss'] = cls_loss
+        scalars['train/cls_acc'] = cls_acc
+
+        self.write_scalars(scalars)
 
     def transform_em_sample(self, x, no_grad=False):
         assert x.ndim == 4
@@ -87,7 +90,7 @@ class DEMTaskTrainer(TaskTrainer):
     def compute_rehearsal_loss(self):
         x, y = self.sample_from_memory(self.config.hp.memory.batch_size)
         x = self.transform_em_sample(x, no_grad=True)
-        pruned_logits = prune_logits(self.model(x), self.learned_classes_mask)
+        pruned_logits = prune_logits(self.model(x), self.learned_classes_mask_t)
         cls_loss = F.cross_entropy(pruned_logits, y)
         cls_acc = compute_accuracy(pruned_logits, y)
 
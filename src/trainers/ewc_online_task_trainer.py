@@ -1,7 +1,8 @@
-from typing import Tuple
+from typing import Tuple, List
 
 import torch
 import torch.nn.functional as F
+from torch.nn.utils import parameters_to_vector
 from torch import Tensor
 import numpy as np
 
@@ -15,7 +16,7 @@ class EWCOnlineTaskTrainer(TaskTrainer):
         prev_trainer = self.get_previous_trainer()
 
         if prev_trainer != None:
-            self.weights_prev = torch.cat([p.data.view(-1) for p in self.model.parameters()])
+            self.weights_prev = parameters_to_vector(self.model.parameters()).detach()
 
             curr_fisher = self.compute_importances(self.train_dataloader, prev_trainer.output_mask)
 
@@ -26,6 +27,11 @@ class EWCOnlineTaskTrainer(TaskTrainer):
 
             self.fisher = self.config.hp.fisher.gamma * prev_fisher + curr_fisher
 
+            # Splitting into per-parameter chunks once, so we do not need
+            # to concatenate the whole weights vector on each iteration
+            self.weights_prev_chunks = self.split_by_params(self.weights_prev)
+            self.fisher_chunks = self.split_by_params(self.get_weights_importances())
+
     def is_trainable(self) -> bool:
         return (self.task_idx == 0) or (self.get_previous_trainer() != None)
 
@@ -48,8 +54,19 @@ class EWCOnlineTaskTrainer(TaskTrainer):
     def compute_importances(self, dataloader, output_mask):
         return compute_diagonal_fisher(self.model, dataloader, output_mask)
 
+    def split_by_params(self, vector: Tensor) -> List[Tensor]:
+        """Splits a flat vector into views shaped as the model parameters"""
+        params = list(self.model.parameters())
+        chunks = vector.split([p.numel() for p in params])
+
+        return [c.view_as(p) for c, p in zip(chunks, params)]
+
     def compute_regularization(self) -> Tensor:
-        weights_curr = torch.cat([p.view(-1) for p in self.model.parameters()])
-        reg = torch.dot((weights_curr - self.weights_prev).pow(2), self.get_weights_importances())
+        reg = 0
+
+        for p, w, f in zip(self.model.parameters(), self.weights_prev_chunks, self.fisher_chunks):
+            diff = (p - w).view(-1)
+            # Dot product fuses squaring with the reduction, avoiding a separate `pow(2)` temporary
+            reg = reg + torch.dot(diff * f.view(-1), diff)
 
         return reg
@@ -13,34 +13,37 @@ class iCarlTaskTrainer(TaskTrainer):
     def train_on_batch(self, batch):
         self.model.train()
 
-        x = torch.from_numpy(np.array(batch[0])).to(self.device_name)
-        y = torch.from_numpy(np.array(batch[1])).to(self.device_name)
+        x = self.to_device(batch[0])
+        y = self.to_device(batch[1])
 
         logits = self.model(x)
-        pruned_logits = prune_logits(logits, self.output_mask)
+        pruned_logits = prune_logits(logits, self.output_mask_t)
 
         cls_loss = F.cross_entropy(pruned_logits, y)
         cls_acc = compute_accuracy(pruned_logits, y)
 
         total_loss = cls_loss
+        scalars = {}
 
         if self.task_idx > 0:
             rehearsal_loss, rehearsal_acc = self.compute_rehearsal_loss()
             total_loss += self.config.hp.memory.loss_coef * rehearsal_loss
 
-            self.writer.add_scalar('train/rehearsal_loss', rehearsal_loss.item(), self.num_iters_done)
-            self.writer.add_scalar('train/rehearsal_acc', rehearsal_acc.item(), self.num_iters_done)
+            scalars['train/rehearsal_loss'] = rehearsal_loss
+            scalars['train/rehearsal_acc'] = rehearsal_acc
 
         self.optim.zero_grad()
         total_loss.backward()
         self.optim.step()
 
-        self.writer.add_scalar('train/cls_loss', cls_loss.item(), self.num_iters_done)
-        self.writer.add_scalar('train/cls_acc', cls_acc.item(), self.num_iters_done)
+        scalars['train/cls_loss'] = cls_loss
+        scalars['train/cls_acc'] = cls_acc
+
+        self.write_scalars(scalars)
 
     def compute_rehearsal_loss(self):
         x, y = self.sample_from_memory(self.config.hp.memory.batch_size)
-        pruned_logits = prune_logits(self.model(x), self.learned_classes_mask)
+        pruned_logits = prune_logits(self.model(x), self.learned_classes_mask_t)
         cls_loss = F.cross_entropy(pruned_logits, y)
         cls_acc = compute_accuracy(pruned_logits, y)
 
@@ -1,6 +1,6 @@
 import os
 import random
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, Dict
 
 import numpy as np
 import torch
@@ -12,7 +12,7 @@ import numpy as np
 from tqdm import tqdm
 from firelab.config import Config
 
-from src.utils.data_utils import construct_output_mask, flatten, remap_targets
+from src.utils.data_utils import construct_output_mask, construct_targets_remap, flatten, remap_targets
 from src.dataloaders.utils import create_custom_dataset
 from src.utils.training_utils import (
     construct_optimizer,
@@ -38,13 +38,13 @@ class TaskTrainer:
         self.attrs = self.model.attrs if hasattr(self.model, 'attrs') else None
         self.task_ds_train, self.task_ds_test = main_trainer.data_splits[task_idx]
         self.output_mask = construct_output_mask(main_trainer.class_splits[task_idx], self.config.lll_setup.num_classes)
+        self.output_mask_t = torch.from_numpy(self.output_mask).to(self.device_name)
         self.classes = self.main_trainer.class_splits[self.task_idx]
         self.learned_classes = np.unique(flatten(self.main_trainer.class_splits[self.start_task_idx:self.task_idx])).tolist()
         self.learned_classes_mask = construct_output_mask(self.learned_classes, self.config.data.num_classes)
+        self.learned_classes_mask_t = torch.from_numpy(self.learned_classes_mask).to(self.device_name)
         self.seen_classes = np.unique(flatten(self.main_trainer.class_splits[self.start_task_idx:self.task_idx + 1])).tolist()
-        self.seen_classes_mask = construct_output_mask(self.seen_classes, self.config.data.num_classes)
-        if self.task_idx >= self.config.start_task:
-            self.curr_classes_across_seen_mask = construct_output_mask(remap_targets(self.classes, self.seen_classes), len(self.seen_classes))
+        self.init_class_indices()
         self.init_dataloaders()
         self.init_episodic_memory()
         self.test_acc_batch_history = []
@@ -60,6 +60,23 @@ class TaskTrainer:
         if self.config.hp.get('reinit_after_each_task'):
             self.model.load_state_dict(self.main_trainer.create_model().state_dict())
 
+    def init_class_indices(self):
+        """
+        Puts on the device class indices which we use to select logits and remap targets
+        """
+        num_classes = self.config.data.num_classes
+        # Task classes can contain duplicates (see `split_classes_for_tasks`),
+        # but each class should contribute to the softmax only once
+        unique_classes = np.unique(self.classes).tolist()
+
+        self.seen_classes_idx = torch.tensor(self.seen_classes).long().to(self.device_name)
+        self.classes_idx = torch.tensor(unique_classes).long().to(self.device_name)
+        self.classes_remap = torch.from_numpy(construct_targets_remap(unique_classes, num_classes)).to(self.device_name)
+        self.seen_classes_remap = torch.from_numpy(construct_targets_remap(self.seen_classes, num_classes)).to(self.device_name)
+
+        if self.task_idx >= self.config.start_task:
+            self.curr_classes_across_seen_idx = torch.tensor(remap_targets(unique_classes, self.seen_classes)).long().to(self.device_name)
+
     def init_writer(self):
         if not self.config.get('no_saving'):
             self.writer = SummaryWriter(os.path.join(self.main_trainer.paths.logs_path, f'task_{self.task_idx}'), flush_secs=5)
@@ -70,6 +87,18 @@ class TaskTrainer:
             if not self.config.get('no_saving'):
                 self.writer.add_scalar('cls/grad_norm', grad_norm, self.num_iters_done)
 
+    def write_scalars(self, scalars: Dict[str, Tensor]):
+        """
+        Writes a dict of scalar tensors to tensorboard.
+        All the values are fetched from the device at once, so we sync only once per call
+        """
+        if self.config.get('no_saving') or len(scalars) == 0: return
+
+        values = torch.stack([v.detach().float() for v in scalars.values()]).cpu().tolist()
+
+        for name, value in zip(scalars.keys(), values):
+            self.writer.add_scalar(name, value, self.num_iters_done)
+
     def construct_optimizer(self):
         if self.config.hp.optim.get('reuse') and self.task_idx > 0:
             return self.get_previous_trainer().optim
@@ -99,26 +128,44 @@ class TaskTrainer:
         return ds
 
     def compute_loss(self, model: nn.Module, batch: Tuple[Tensor, Tensor]):
-        if self.config.hp.use_class_attrs:
-            targets = remap_targets(batch[1], self.seen_classes)
-            x = torch.from_numpy(np.array(batch[0])).to(self.device_name)
-            y = torch.from_numpy(np.array(targets)).to(self.device_name)
+        # Instead of pruning logits of other classes to -inf, we select the logits
+        # of the current classes and remap targets into their local range
+        x = self.to_device(batch[0])
+        y = self.to_device(batch[1])
 
-            logits = model(x, attrs_mask=self.seen_classes_mask)
+        if self.config.hp.use_class_attrs:
+            logits = model(x, attrs_mask=self.seen_classes_idx)
 
             if self.config.task_trainer == 'joint':
-                pass
+                y = self.seen_classes_remap[y]
             else:
-                logits = prune_logits(logits, self.curr_classes_across_seen_mask)
+                logits = logits.index_select(1, self.curr_classes_across_seen_idx)
+                y = self.classes_remap[y]
         else:
-            x = torch.from_numpy(np.array(batch[0])).to(self.device_name)
-            y = torch.from_numpy(np.array(batch[1])).to(self.device_name)
-
             logits = model(x)
-            logits = prune_logits(logits, self.output_mask)
+
+            if self.config.task_trainer == 'joint':
+                logits = prune_logits(logits, self.output_mask_t)
+            else:
+                logits = logits.index_select(1, self.classes_idx)
+                y = self.classes_remap[y]
 
         return self.criterion(logits, y)
 
+    def to_device(self, data: List[Any]) -> Tensor:
+        """
+        Stacks a list of numpy arrays (or numbers) into a tensor and moves it to the device.
+        For CUDA, the tensor is pinned first so the copy does not block the host.
+        """
+        data = torch.from_numpy(np.array(data))
+
+        if torch.device(self.device_name).type == 'cuda':
+            data = data.pin_memory().to(self.device_name, non_blocking=True)
+        else:
+            data = data.to(self.device_name)
+
+        return data
+
     def _after_init_hook(self):
         pass
 
@@ -201,8 +248,8 @@ class TaskTrainer:
 
         with torch.no_grad():
             for x, y in dataloader:
-                x = torch.from_numpy(np.array(x)).to(self.device_name)
-                y = torch.from_numpy(np.array(y)).to(self.device_name)
+                x = self.to_device(x)
+                y = self.to_device(y)
 
                 pruned_logits = self.model.compute_pruned_predictions(x, self.output_mask)
 
@@ -222,8 +269,8 @@ class TaskTrainer:
     def sample_from_memory(self, batch_size: int) -> Tuple[Tensor, Tensor]:
         samples = random.choices(self.episodic_memory, k=batch_size)
         x, y = zip(*samples)
-        x = torch.from_numpy(np.array(x)).to(self.device_name)
-        y = torch.tensor(y).to(self.device_name)
+        x = self.to_device(x)
+        y = self.to_device(y)
 
         return x, y
 
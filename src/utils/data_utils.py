@@ -125,3 +125,21 @@ def remap_targets(targets: List[int], classes: List[int]) -> List[int]:
     :return: remapped classes
     """
     return [(classes.index(t) if t in classes else -1) for t in targets]
+
+
+def construct_targets_remap(classes: List[int], total_num_classes: int) -> np.ndarray:
+    """
+    Constructs a lookup table which does the same as `remap_targets`,
+    but can be indexed with a tensor of targets (e.g. on the device)
+
+    :param classes: classes to map to
+    :param total_num_classes: size of the lookup table
+    :return: vector of length [total_num_classes] with -1 for classes not in `classes`
+    """
+    remap = np.full(total_num_classes, -1)
+
+    # Going in the reversed order, so duplicates are mapped to the first occurrence (as `list.index` does)
+    for i, c in reversed(list(enumerate(classes))):
+        remap[c] = i
+
+    return remap
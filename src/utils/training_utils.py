@@ -1,3 +1,5 @@
+from typing import Union, Optional
+
 import numpy as np
 import torch
 import torch.nn as nn
@@ -68,19 +70,30 @@ def compute_accuracy(logits: Tensor, targets: Tensor, *args, **kwargs) -> Tensor
     return compute_guessed(logits, targets, *args, **kwargs).mean()
 
 
-def compute_guessed(logits: Tensor, targets: Tensor, to_device='cpu') -> Tensor:
+def compute_guessed(logits: Tensor, targets: Tensor, to_device: Optional[str]=None) -> Tensor:
+    """
+    Returns a float vector of correct guesses.
+    It stays on the logits device unless `to_device` is given, so we do not sync with the GPU on each step
+    """
     assert logits.ndim == 2
     assert targets.ndim == 1
     assert len(logits) == len(targets)
 
-    return (logits.argmax(dim=1) == targets).float().detach().to(to_device)
+    guessed = (logits.argmax(dim=1) == targets).float().detach()
 
+    return guessed if to_device is None else guessed.to(to_device)
 
-def prune_logits(logits: Tensor, output_mask:np.ndarray) -> Tensor:
+
+def prune_logits(logits: Tensor, output_mask: Union[np.ndarray, Tensor]) -> Tensor:
     """
     Takes logits and sets those classes which do not participate
-    in the current task to -infinity so they are not explicitly penalized and forgotten
+    in the current task to -infinity so they are not explicitly penalized and forgotten.
+    Output mask can be a bool tensor which is already on the logits device:
+    this way we do not copy it to the device on each call.
     """
+    if isinstance(output_mask, Tensor):
+        return logits.masked_fill(~output_mask, NEG_INF)
+
     mask_idx = np.nonzero(~output_mask)[0]
     pruned = logits.index_fill(1, torch.tensor(mask_idx).to(logits.device), NEG_INF)
 
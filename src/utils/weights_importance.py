@@ -50,10 +50,15 @@ def compute_grad(model: nn.Module, criterion: nn.Module, dataloader: DataLoader,
     :param dataloader:
     :return:
     """
+    if elementwise_grad_norm not in {'square', 'abs'}:
+        raise NotImplementedError(f'Unknown elementwise grad norm: {elementwise_grad_norm}')
+
     num_samples = 0
     num_params = sum(p.numel() for p in model.parameters())
     device = get_module_device(model)
     grad = torch.zeros(num_params).to(device)
+    # Views into `grad`, so we accumulate in-place without concatenating grads on each batch
+    grad_chunks = grad.split([p.numel() for p in model.parameters()])
 
     for x, y in dataloader:
         x = torch.from_numpy(np.array(x)).to(device)
@@ -64,16 +69,15 @@ def compute_grad(model: nn.Module, criterion: nn.Module, dataloader: DataLoader,
 
         model.zero_grad()
         loss.backward()
-        curr_grad = torch.cat([get_grad(p).view(-1) for p in model.parameters()])
 
-        if elementwise_grad_norm == 'square':
-            curr_grad = curr_grad.pow(2)
-        elif elementwise_grad_norm == 'abs':
-            curr_grad = curr_grad.abs()
-        else:
-            raise NotImplementedError(f'Unknown elementwise grad norm: {elementwise_grad_norm}')
+        for g, p in zip(grad_chunks, model.parameters()):
+            curr_grad = get_grad(p).view(-1)
+
+            if elementwise_grad_norm == 'square':
+                g.addcmul_(curr_grad, curr_grad)
+            else:
+                g.add_(curr_grad.abs())
 
-        grad += curr_grad
         num_samples += len(x)
 
     return grad / num_samples
@@ -0,0 +1,78 @@
+import sys; sys.path.append('.')
+import itertools
+
+import pytest
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from firelab.config import Config
+
+from src.trainers.basic_task_trainer import BasicTaskTrainer
+from src.utils.data_utils import construct_output_mask, remap_targets
+from src.utils.training_utils import prune_logits
+
+
+def create_trainer(use_class_attrs: bool, num_classes: int, classes, seen_classes) -> BasicTaskTrainer:
+    trainer = BasicTaskTrainer.__new__(BasicTaskTrainer)
+    trainer.config = Config({
+        'task_trainer': 'basic',
+        'start_task': 0,
+        'hp': {'use_class_attrs': use_class_attrs},
+        'data': {'num_classes': num_classes},
+    })
+    trainer.device_name = 'cpu'
+    trainer.task_idx = 1
+    trainer.classes = classes
+    trainer.seen_classes = seen_classes
+    trainer.criterion = nn.CrossEntropyLoss()
+    trainer.init_class_indices()
+
+    return trainer
+
+
+def compute_loss_slow(logits, targets, use_class_attrs: bool, num_classes: int, classes, seen_classes):
+    if use_class_attrs:
+        output_mask = construct_output_mask(remap_targets(classes, seen_classes), len(seen_classes))
+        targets = remap_targets(targets, seen_classes)
+    else:
+        output_mask = construct_output_mask(classes, num_classes)
+
+    return F.cross_entropy(prune_logits(logits, output_mask), torch.tensor(targets))
+
+
+def test_compute_loss_on_random_data():
+    num_classes = 50
+    batch_size = 32
+
+    for use_class_attrs, has_duplicates in itertools.product([True, False], [False, True]):
+        for _ in range(10):
+            all_classes = np.random.permutation(num_classes)
+            classes = all_classes[:10].tolist()
+
+            if has_duplicates:
+                # `split_classes_for_tasks` can put the same class into a task several times
+                classes = classes + classes[:3]
+
+            seen_classes = np.unique(all_classes[:25]).tolist()
+            trainer = create_trainer(use_class_attrs, num_classes, classes, seen_classes)
+
+            x = [np.random.randn(3).astype(np.float32) for _ in range(batch_size)]
+            targets = tuple(np.random.choice(classes, size=batch_size).tolist())
+            logits = torch.randn(batch_size, len(seen_classes) if use_class_attrs else num_classes)
+            model = lambda x, **kwargs: logits
+
+            loss_fast = trainer.compute_loss(model, (x, targets))
+            loss_slow = compute_loss_slow(logits, targets, use_class_attrs, num_classes, classes, seen_classes)
+
+            assert torch.allclose(loss_fast, loss_slow, rtol=1e-5)
+
+
+def test_compute_loss_fails_on_unknown_targets():
+    trainer = create_trainer(False, 10, [1, 2, 3], [1, 2, 3])
+    x = [np.random.randn(3).astype(np.float32) for _ in range(4)]
+    model = lambda x, **kwargs: torch.randn(4, 10)
+
+    # Unknown targets are remapped to -1, so cross entropy refuses them
+    with pytest.raises((IndexError, RuntimeError)):
+        trainer.compute_loss(model, (x, (1, 2, 3, 5)))
@@ -0,0 +1,31 @@
+import sys; sys.path.append('.')
+
+import torch
+import torch.nn as nn
+
+from src.trainers.ewc_online_task_trainer import EWCOnlineTaskTrainer
+
+
+def compute_regularization_slow(model: nn.Module, weights_prev: torch.Tensor, fisher: torch.Tensor) -> torch.Tensor:
+    weights_curr = torch.cat([p.view(-1) for p in model.parameters()])
+
+    return torch.dot((weights_curr - weights_prev).pow(2), fisher)
+
+
+def test_regularization_on_random_data():
+    for _ in range(10):
+        trainer = EWCOnlineTaskTrainer.__new__(EWCOnlineTaskTrainer)
+        trainer.model = nn.Sequential(nn.Linear(7, 5), nn.ReLU(), nn.Linear(5, 3))
+        num_params = sum(p.numel() for p in trainer.model.parameters())
+        weights_prev = torch.randn(num_params)
+        fisher = torch.rand(num_params)
+        trainer.weights_prev_chunks = trainer.split_by_params(weights_prev)
+        trainer.fisher_chunks = trainer.split_by_params(fisher)
+
+        reg_fast = trainer.compute_regularization()
+        reg_slow = compute_regularization_slow(trainer.model, weights_prev, fisher)
+        assert torch.allclose(reg_fast, reg_slow, rtol=1e-5)
+
+        grads_fast = torch.autograd.grad(reg_fast, list(trainer.model.parameters()))
+        grads_slow = torch.autograd.grad(reg_slow, list(trainer.model.parameters()))
+        assert all(torch.allclose(g_f, g_s, rtol=1e-5) for g_f, g_s in zip(grads_fast, grads_slow))
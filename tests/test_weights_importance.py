@@ -0,0 +1,41 @@
+import sys; sys.path.append('.')
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from src.utils.training_utils import prune_logits
+from src.utils.weights_importance import compute_grad, get_grad
+
+
+def compute_grad_slow(model, criterion, dataloader, output_mask, elementwise_grad_norm):
+    num_samples = 0
+    grad = torch.zeros(sum(p.numel() for p in model.parameters()))
+
+    for x, y in dataloader:
+        x = torch.from_numpy(np.array(x))
+        y = torch.tensor(y)
+        loss = criterion(prune_logits(model(x), output_mask), y)
+
+        model.zero_grad()
+        loss.backward()
+        curr_grad = torch.cat([get_grad(p).view(-1) for p in model.parameters()])
+        grad += curr_grad.pow(2) if elementwise_grad_norm == 'square' else curr_grad.abs()
+        num_samples += len(x)
+
+    return grad / num_samples
+
+
+def test_compute_grad_on_toy_model():
+    num_classes = 4
+    dataset = [(np.random.randn(6).astype(np.float32), np.random.randint(num_classes)) for _ in range(50)]
+    dataloader = DataLoader(dataset, batch_size=8, collate_fn=lambda b: list(zip(*b)))
+    output_mask = np.ones(num_classes).astype(bool)
+    model = nn.Sequential(nn.Linear(6, 5), nn.ReLU(), nn.Linear(5, num_classes))
+
+    for elementwise_grad_norm in ['square', 'abs']:
+        grad_fast = compute_grad(model, nn.CrossEntropyLoss(), dataloader, output_mask, elementwise_grad_norm)
+        grad_slow = compute_grad_slow(model, nn.CrossEntropyLoss(), dataloader, output_mask, elementwise_grad_norm)
+
+        assert torch.allclose(grad_fast, grad_slow, rtol=1e-5, atol=1e-8)